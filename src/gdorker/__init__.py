@@ -1,22 +1,49 @@
 #!/usr/bin/env python
 import argparse
 import json
+import orjson
 import os
 import time
+import atexit
+import random
+import functools
+import itertools
+import hashlib
 import signal
-from typing import Dict, List, Optional, Any, NoReturn, Callable, Union
-from types import TracebackType
+from typing import Dict, List, Optional, Any, Awaitable, Callable, Iterator, Mapping, Union, Set, Tuple, Deque
+from types import TracebackType, SimpleNamespace
+from collections import deque
+from urllib.parse import urldefrag
 from googleapiclient.discovery import build
 from colorama import init, Fore
 import sys
 import asyncio
+import threading
 import aiohttp
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 import re
-import requests
 from duckduckgo_search import DDGS
 
-init(autoreset=True)
+# Redirected output gets neither colorama's stream wrapper nor escape codes
+_COLOR = sys.stdout.isatty()
+if _COLOR:
+    init(autoreset=True)
+else:
+    Fore = SimpleNamespace(**{name: '' for name in vars(Fore)})
+
+_WS = re.compile(r'\s+')
+# Body preview keeps 100 chars; whitespace runs collapse, so a few KB is plenty
+_BODY_SCAN = 4096
+_TEXT_TYPES = ('text/', 'application/xhtml', 'application/xml')
+
+_TITLE_PFX = f"{Fore.MAGENTA}["
+_URL_PFX = f"{Fore.GREEN}["
+_BODY_PFX = f"{Fore.CYAN}["
+_DEBUG_PFX = f"{Fore.LIGHTBLACK_EX}[DEBUG] "
+_INFO_PFX = f"{Fore.BLUE}[INFO] "
+_ERROR_PFX = f"{Fore.RED}[ERROR] "
+_RESULT_PFX = f"{Fore.BLUE}[URL] "
+_CODE_COLORS = {2: Fore.GREEN, 3: Fore.YELLOW, 4: Fore.RED, 5: Fore.RED}
 
 banner = """
 ⠀⠀⣠⣶⣶⣦⣤⡄⠀⠀⠀⠀⠀⠀⠀⢠⣤⣤⣤⣀⣀⡀⠀⠀⠀⠀⣠⣤⣤⣤⣄⠀⠀⠀⣤⣤⣤⣤⣤⣀⡀⠀⠀⣀⣀⣤⡀⢠⣤⣤⣤⠀⣀⣀⣀⣤⣤⣤⣤⡄⠀⢠⣤⣤⣤⣤⣄⣀⠀⠀
@@ -29,76 +56,100 @@ banner = """
 """
 
 # todo: errors NoMoreResultsException and ResourceExhaustedException
-# todo: async requests
 # todo: save data inside session class and pass it google search
 
+# Dork hits often serve identical pages (login walls, parked domains, error pages),
+# so the parsed preview is memoised on the fetched HTML
+@functools.lru_cache(maxsize=32)
+def _page_text(html: str) -> str:
+    node = LexborHTMLParser(html).body
+    body: str = node.text(separator=" ") if node else ""
+    return _WS.sub(" ", body.lstrip()[:_BODY_SCAN]).strip()[0:100]
+
+
 class Formatter:
     def __init__(self, options: Dict[str, Any]) -> None:
         self.options: Dict[str, Any] = options
         self.is_extended: bool = self.options['code'] or (self.options['body'] and self.options['engine'] != 'duckduckgo')
+        # Resolve enabled columns once instead of checking options on every result
+        optional = [('code', self._code), ('title', self._title), ('body', self._body)]
+        self._fields: List[Tuple[str, Callable[[Any], str]]] = [('url', self._url)]
+        self._fields += [(key, fmt) for key, fmt in optional if self.options[key]]
 
     def _title(self, title: str) -> str:
-        return f"{Fore.MAGENTA}[{title}]"
+        return _TITLE_PFX + title + "]"
 
     def _url(self, url: str) -> str:
-        return f"{Fore.GREEN}[{url}]"
+        return _URL_PFX + url + "]"
 
     def _code(self, code: int) -> str:
-        color = Fore.WHITE
-        if code >= 200 and code < 300:
-            color = Fore.GREEN
-        elif code >= 300 and code < 400:
-            color = Fore.YELLOW
-        elif code >= 400 and code < 600:
-            color = Fore.RED
-        return f"{color}[{code}]"
+        return _CODE_COLORS.get(code // 100, Fore.WHITE) + "[" + str(code) + "]"
 
     def _body(self, html: str) -> str:
-        soup = BeautifulSoup(html, 'html.parser')
-        body: str = soup.body.get_text() if soup.body else ""
-        text: str = re.sub(r'[\s]+', " ", body).strip()[0:100]
-        return f"{Fore.CYAN}[{text}]"
+        return _BODY_PFX + _page_text(html) + "]"
 
     def debug(self, info: str) -> str:
-        return f"{Fore.LIGHTBLACK_EX}[DEBUG] {info}"
+        return _DEBUG_PFX + info
 
     def info(self, info: str) -> str:
-        return f"{Fore.BLUE}[INFO] {info}"
+        return _INFO_PFX + info
 
     def error(self, error: str) -> str:
-        return f"{Fore.RED}[ERROR] {error}"
-
-    def _result(self, info: str) -> str:
-        return f"{Fore.BLUE}[URL] {info}"
+        return _ERROR_PFX + error
 
     def result(self, pieces: Dict[str, str]) -> str:
-        output = [self._url(pieces["url"])]
+        return _RESULT_PFX + ' '.join([fmt(pieces[key]) for key, fmt in self._fields])
 
-        if self.options['code']:
-            output.append(self._code(pieces["code"]))
-        if self.options['title']:
-            output.append(self._title(pieces['title']))
-        if self.options['body']:
-            output.append(self._body(pieces["body"]))
-        return self._result(' '.join(output))
+
+class PlainFormatter(Formatter):
+    # Result lines for the output file, which never gets escape codes
+    def _title(self, title: str) -> str:
+        return "[" + title + "]"
+
+    def _url(self, url: str) -> str:
+        return "[" + url + "]"
+
+    def _code(self, code: int) -> str:
+        return "[" + str(code) + "]"
+
+    def _body(self, html: str) -> str:
+        return "[" + _page_text(html) + "]"
+
+    def result(self, pieces: Dict[str, str]) -> str:
+        return "[URL] " + ' '.join([fmt(pieces[key]) for key, fmt in self._fields])
 
 
 class Logger:
+    flush_every = 64
+
     def __init__(self, options: Dict[str, Any]) -> None:
         self.dest = options['dest']
         self.debug_enabled = options['debug']
         self.formatter = Formatter(options)
+        self.file_formatter = PlainFormatter(options) if _COLOR else self.formatter
+        self._buf: List[str] = []
         if self.dest and isinstance(self.dest, str):
-            self.dest = open(self.dest, 'a')
+            self.dest = open(self.dest, 'a', buffering=1 << 16)
+            atexit.register(self.flush)
 
     def _write(self, line: str) -> None:
-        print(line)
+        sys.stdout.write(line + '\n')
 
     def url(self, pieces: Dict[str, str]) -> None:
         line = self.formatter.result(pieces)
         self._write(line)
         if self.dest:
-            print(line, file=self.dest)
+            self._buf.append(self.file_formatter.result(pieces) if _COLOR else line)
+            if len(self._buf) >= self.flush_every:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self.dest or self.dest.closed:
+            return
+        if self._buf:
+            self.dest.write('\n'.join(self._buf) + '\n')
+            self._buf.clear()
+        self.dest.flush()
 
     def info(self, info: str) -> None:
         line = self.formatter.info(info)
@@ -116,110 +167,348 @@ class Logger:
 
     def __exit__(self, exc_type, exc_value, traceback: Optional[TracebackType]) -> None:
         if self.dest:
+            self.flush()
             self.dest.close()
 
 
+class TokenBucket:
+    def __init__(self, rate: float, per: float = 1.0) -> None:
+        self.rate = rate
+        self.per = per
+        self.tokens: float = rate
+        self.updated: float = time.monotonic()
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+        # Tokens may go negative so concurrent waiters queue up instead of bursting
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens * self.per / self.rate)
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, headers: Mapping[str, str], content: bytes) -> None:
+        super().__init__(f"HTTP {status}: {content.decode(errors='replace')}")
+        self.status = status
+        self.headers = headers
+        self.content = content
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    if isinstance(e, ApiError):
+        status, headers = e.status, e.headers
+    else:
+        # googleapiclient's HttpError keeps both on its httplib2 response
+        status = getattr(getattr(e, 'resp', None), 'status', None)
+        headers = getattr(e, 'resp', None)
+    if status != 429:
+        return None
+    # Daily quota won't recover by waiting, let the error handler stop the run
+    if 'per day' in str(e):
+        return None
+    try:
+        return float(headers.get('retry-after', 0))
+    except ValueError:
+        return 0.0
+
+
 class Dorker:
     per_page = 10
-
-    def __init__(self, logger: Logger, client: Callable[[str, int, int], Dict[str, Any]], error_handler) -> None:
+    max_fetches = 10
+    fetch_retries = 2
+    # The body preview only needs the start of the page
+    fetch_limit = 16384
+    fetch_timeout = aiohttp.ClientTimeout(total=10, sock_connect=5)
+    max_queries = 3
+    pipeline_depth = 2
+    max_retries = 5
+    backoff_base = 1.0
+    backoff_cap = 32.0
+
+    def __init__(self, logger: Logger, client: Callable[[str, int, int], Awaitable[Dict[str, Any]]], error_handler,
+                 cache: Optional['SearchCache'] = None) -> None:
         self.logger = logger
-        self.offset: int = 0
+        self.offsets: Dict[str, int] = {}
+        self.done: Set[str] = set()
+        self.seen_urls: Set[str] = set()
+        # Only URLs of settled pages are saved, offsets may still point before the others
+        self.logged_urls: Set[str] = set()
         self.is_limit_reached = False
+        self.is_interrupted = False
+        self.error: Optional[Exception] = None
         self.client = client
         self.error_handler = error_handler
+        self.cache = cache
+        self.bucket = TokenBucket(rate=10, per=1.0)
+        self.fetches = asyncio.Semaphore(self.max_fetches)
+        self.http: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> 'Dorker':
+        # Result links from site: dorks share hosts, resolve each once per run
+        connector = aiohttp.TCPConnector(
+            resolver=aiohttp.AsyncResolver(), ttl_dns_cache=300, limit=50, limit_per_host=20,
+            keepalive_timeout=30)
+        self.http = aiohttp.ClientSession(connector=connector, timeout=self.fetch_timeout, trust_env=True)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback: Optional[TracebackType]) -> None:
+        await self.http.close()
 
     @property
-    def _page(self) -> int:
-        return self.offset // self.per_page + 1
-
-    def _search(self, query: str, start: int = 0) -> List[Dict[str, Any]]:
+    def is_stopped(self) -> bool:
+        return self.is_limit_reached or self.is_interrupted or self.error is not None
+
+    def _backoff(self, e: Exception, attempt: int) -> Optional[float]:
+        if attempt >= self.max_retries:
+            return None
+        # Dropped connections and timeouts to the search API are retried like a 429 without Retry-After
+        retry_after = 0.0 if isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)) else _retry_after(e)
+        if retry_after is None:
+            return None
+        if retry_after:
+            return retry_after
+        return min(self.backoff_cap, self.backoff_base * 2 ** attempt) + random.uniform(0, 1)
+
+    async def _request(self, query: str, start: int) -> Dict[str, Any]:
+        key = (query, start, self.per_page)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.logger.debug(f"Cached results for query: {query}, start: {start}")
+                return cached
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            try:
+                res = await self.client(query, start, self.per_page)
+            except Exception as e:
+                delay = self._backoff(e, attempt)
+                if delay is None:
+                    raise
+                self.logger.debug(f"Search failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            if self.cache:
+                self.cache.set(key, res)
+            return res
+
+    async def _search(self, query: str, start: int = 0) -> List[Dict[str, Any]]:
         try:
-            res = self.client(query, start, self.per_page)
+            res = await self._request(query, start)
             items = res.get('items', [])
             if len(items) == 0:
-                self.logger.info("No more links for current query")
+                self.logger.info(f"No more links for query: {query}")
                 return []
             return items
         except Exception as e:
             return self.error_handler(e)
 
+    @staticmethod
+    def _is_text(response: aiohttp.ClientResponse) -> bool:
+        # PDFs, images and archives are common dork hits and have no previewable body
+        if 'Content-Type' not in response.headers:
+            return True
+        return response.content_type.startswith(_TEXT_TYPES)
+
+    async def _read_prefix(self, response: aiohttp.ClientResponse) -> str:
+        raw = b''
+        while len(raw) < self.fetch_limit:
+            chunk = await response.content.read(self.fetch_limit - len(raw))
+            if not chunk:
+                break
+            raw += chunk
+        try:
+            return raw.decode(response.charset or 'utf-8', errors='replace')
+        except LookupError:
+            return raw.decode('utf-8', errors='replace')
+
+    async def _probe(self, url: str) -> Tuple[int, str]:
+        with_body = self.logger.formatter.options['body']
+        if not with_body:
+            async with self.http.head(url, allow_redirects=True) as response:
+                # Some servers refuse HEAD, those still get a GET below
+                if response.status not in (405, 501):
+                    return (response.status, '')
+        async with self.http.get(url) as response:
+            text = ''
+            if with_body and self._is_text(response):
+                text = await self._read_prefix(response)
+            return (response.status, text)
+
+    async def _fetch(self, url: str) -> Tuple[int, str]:
+        attempt = 0
+        while True:
+            try:
+                async with self.fetches:
+                    return await self._probe(url)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError):
+                if attempt >= self.fetch_retries:
+                    raise
+                await asyncio.sleep(0.2 * 2 ** attempt)
+                attempt += 1
+
     async def _print_results_extended(self, results: List[Dict[str, Any]]) -> None:
-        async def fetch(session, item):
-            async with session.get(item['link']) as response:
-                text = await response.text()
-                return (item, response.status, text)
-        async with aiohttp.ClientSession() as session:
-            tasks = [fetch(session, item) for item in results]
-            fetched = await asyncio.gather(*tasks)
-            for item, status, body in fetched:
-                pieces = {
-                    "url": item['link'],
-                    "title": item['title'],
-                    "code": status,
-                    "body": body
-                }
-                self.logger.url(pieces)
-
-    def _print_results(self, results: List[Dict[str, Any]]) -> None:
+        tasks = [self._fetch(item['link']) for item in results]
+        fetched = await asyncio.gather(*tasks, return_exceptions=True)
+        for item, res in zip(results, fetched):
+            if isinstance(res, Exception):
+                self.logger.error(f"Failed to fetch {item['link']}: {res}")
+                continue
+            status, body = res
+            pieces = {
+                "url": item['link'],
+                "title": item['title'],
+                "code": status,
+                "body": body
+            }
+            self.logger.url(pieces)
+
+    async def _print_results(self, results: List[Dict[str, Any]]) -> List[str]:
+        fresh = []
+        urls = []
+        for item in results:
+            # Fragments never reach the server, page#a and page#b are the same fetch
+            url = urldefrag(item['link']).url
+            if url in self.seen_urls:
+                continue
+            self.seen_urls.add(url)
+            fresh.append(item)
+            urls.append(url)
+        results = fresh
         if self.logger.formatter.is_extended:
-            return asyncio.run(self._print_results_extended(results))
+            await self._print_results_extended(results)
+            return urls
         for item in results:
             pieces = {
                 "url": item['link'],
                 "title": item['title']
             }
             self.logger.url(pieces)
+        return urls
 
-    def query_results(self, query: str, offset: Optional[int]) -> None:
+    async def _settle(self, query: str, batches: Deque[Tuple[int, asyncio.Task]]) -> None:
+        next_offset, batch = batches.popleft()
+        self.logged_urls.update(await batch)
+        self.offsets[query] = next_offset
+
+    async def query_results(self, query: str, offset: Optional[int]) -> None:
         if offset is None:
             offset = 0
-        self.offset: int = offset
-        self.query = query
-        while not self.is_limit_reached:
-            self.logger.info(f"Page {self._page}")
-            results = self._search(query, start=self.offset)
-            self._print_results(results)
-            if not results:
-                break
-            self.offset = self.offset + self.per_page
-            time.sleep(1)
+        self.offsets[query] = offset
+        # Probes of a slow page keep running while later pages are searched and probed;
+        # offsets only move past a page once all of its results are logged
+        batches: Deque[Tuple[int, asyncio.Task]] = deque()
+        finished = False
+        page = asyncio.create_task(self._search(query, start=offset))
+        try:
+            while not self.is_stopped:
+                results = await page
+                if not results:
+                    finished = True
+                    break
+                # Ask for the next page while this one's URLs are being probed
+                page = asyncio.create_task(self._search(query, start=offset + self.per_page))
+                self.logger.info(f"Page {offset // self.per_page + 1} of query: {query}")
+                offset = offset + self.per_page
+                batches.append((offset, asyncio.create_task(self._print_results(results))))
+                while len(batches) > self.pipeline_depth:
+                    await self._settle(query, batches)
+        finally:
+            page.cancel()
+            while batches:
+                await self._settle(query, batches)
+        if finished:
+            del self.offsets[query]
+            self.done.add(query)
 
 class Session:
     def __init__(self, file: str) -> None:
         self.file = file
 
     def load(self) -> Dict[str, Any]:
-        with open(self.file, "r") as f:
-            j = json.loads(f.read())
+        with open(self.file, "rb") as f:
+            j = orjson.loads(f.read())
             return j
 
     def clean(self) -> None:
         os.remove(self.file)
 
-    def save(self, file_or_query: Union[str, List[str]], logger: Logger, gs: Dorker) -> None:
+    def save(self, file_or_query: Union[str, List[str]], logger: Logger, gs: Dorker, queries: List[str]) -> None:
+        # Results must be on disk before the session claims their pages are done
+        logger.flush()
+        pending = [i for i, q in enumerate(queries) if q not in gs.done]
+        index = pending[0] if pending else len(queries)
         session = {
             'file_or_query': file_or_query,
             'options': logger.formatter.options,
-            'current_query': gs.query,
-            'offset': gs.offset
+            'current_query': queries[index] if pending else None,
+            'offsets': gs.offsets,
+            'done': [q for q in queries[index:] if q in gs.done],
+            'seen_urls': list(gs.logged_urls)
         }
-        j = json.dumps(session, indent=2)
-        with open(self.file, 'w') as f:
+        j = orjson.dumps(session)
+        # Write aside and swap in so an interrupted save never leaves a torn session file
+        tmp = self.file + '.tmp'
+        with open(tmp, 'wb') as f:
             f.write(j)
+        os.replace(tmp, self.file)
+
+class SearchCache:
+    def __init__(self, namespace: str, ttl: int = 24 * 60 * 60, cache_dir: str = '~/.cache/gdorker') -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self.cache_dir = os.path.expanduser(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._prune()
+
+    def _prune(self) -> None:
+        # Pages that are never asked for again would otherwise stay on disk forever
+        now = time.time()
+        for entry in os.scandir(self.cache_dir):
+            try:
+                if now - entry.stat().st_mtime > self.ttl:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _path(self, key: Tuple[Any, ...]) -> str:
+        digest = hashlib.sha1('|'.join(map(str, (self.namespace, *key))).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
 
-def handle_exit_signal(session: Session, api_key: str, cse_id: str, file_or_query: str, logger: Logger, gs: Dorker) -> NoReturn:
-    logger.info("Interrupted by user, saving session...")
-    session.save(file_or_query, logger, gs)
-    exit(0)
+    def get(self, key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+
+    def set(self, key: Tuple[Any, ...], value: Dict[str, Any]) -> None:
+        path = self._path(key)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(orjson.dumps(value))
+        os.replace(tmp, path)
+
+def handle_exit_signal(gs: Dorker) -> None:
+    # Only flag here; main saves the session once in-flight pages have settled
+    if gs.is_interrupted:
+        raise KeyboardInterrupt
+    gs.is_interrupted = True
 
 def load_queries(file_or_query: str) -> List[str]:
     try:
         with open(file_or_query, 'r') as f:
-            queries = f.readlines()
-            unique = list(set(queries))
+            lines = (line.strip() for line in f)
+            unique = list(dict.fromkeys(q for q in lines if q and not q.startswith('#')))
             return unique
-    except Exception as e:
+    except OSError:
         return [file_or_query]
 
 class ConfigManager:
@@ -240,8 +529,8 @@ class ConfigManager:
                 json.dump(self.default_content, f, indent=4)
     
     def load_api_keys(self):
-        with open(self.config_path, 'r') as f:
-            return json.load(f)
+        with open(self.config_path, 'rb') as f:
+            return orjson.loads(f.read())
     
     def set_api_keys(self, api_key, cse_id):
         self.api_key = api_key
@@ -257,34 +546,72 @@ class ConfigManager:
         return api_key, cse_id
 
 class SearchClient:
-    def __init__(self, search_engine='google', config: ConfigManager = None):
+    cse_url = 'https://customsearch.googleapis.com/customsearch/v1'
+    ddg_max_results = 1000
+    # Search calls share the probe session but may legitimately take longer than a page probe
+    search_timeout = aiohttp.ClientTimeout(total=30, sock_connect=10)
+
+    def __init__(self, search_engine='google', config: ConfigManager = None, api_client: bool = False):
         self.search_engine = search_engine
         self.config = config
+        self.http: Optional[aiohttp.ClientSession] = None
+        self.is_limit_reached = False
         
         if search_engine == 'google':
             self.api_key, self.cse_id = self.config.get_google_api_keys()
-            self.client = self._create_google_client()
+            self.client = self._create_google_api_client() if api_client else self._create_google_client()
         elif search_engine == 'duckduckgo':
             self.client = self._create_duckduckgo_client()
         else:
             raise ValueError(f"Unsupported search engine: {search_engine}")
 
+    @property
+    def cache_namespace(self) -> str:
+        # Each Programmable Search Engine has its own sites and settings, so results don't carry over
+        if self.search_engine == 'google':
+            return f"{self.search_engine}:{self.cse_id}"
+        return self.search_engine
+
     def _create_google_client(self):
-        return lambda q, start, per_page: build("customsearch", "v1", developerKey=self.api_key).cse().list(
-            q=q, cx=self.cse_id, start=start, num=per_page).execute()
+        async def search(q: str, start: int, per_page: int) -> Dict[str, Any]:
+            params = {'key': self.api_key, 'cx': self.cse_id, 'q': q, 'start': start + 1, 'num': per_page}
+            async with self.http.get(self.cse_url, params=params, timeout=self.search_timeout) as response:
+                content = await response.read()
+                if response.status >= 400:
+                    raise ApiError(response.status, response.headers, content)
+                return orjson.loads(content)
+
+        return search
+
+    def _create_google_api_client(self):
+        # Searches run in worker threads and httplib2 isn't thread-safe, keep one resource per thread
+        local = threading.local()
+
+        def search(q: str, start: int, per_page: int) -> Dict[str, Any]:
+            if not hasattr(local, 'cse'):
+                local.cse = build("customsearch", "v1", developerKey=self.api_key, cache_discovery=False).cse()
+            return local.cse.list(q=q, cx=self.cse_id, start=start + 1, num=per_page).execute()
+
+        return search
     
     def _create_duckduckgo_client(self):
+        # DDG has no offsets, run each query once and hand out pages from where the last one ended
+        pages: Dict[str, Tuple[Iterator[Dict[str, str]], int]] = {}
+
         def search(query: str, start: int, per_page: int) -> Dict[str, Any]:
             try:
-                results = []
-                with DDGS() as ddgs:
-                    for r in ddgs.text(query, max_results=1000):
-                        results.append({
-                            'title': r['title'],
-                            'link': r['href'],
-                            'body': r['body']
-                        })
+                it, pos = pages.get(query, (None, None))
+                if pos != start:
+                    it = iter(DDGS().text(query, max_results=self.ddg_max_results))
+                    pos = 0
+                results = [{
+                    'title': r['title'],
+                    'link': r['href'],
+                    'body': r['body']
+                } for r in itertools.islice(it, start - pos, start - pos + per_page)]
+                pages[query] = (it, start + per_page)
                 if not results:
+                    del pages[query]
                     self.logger.info("No more links for current query")
                     return {'items': []}
                 return {'items': results}
@@ -293,14 +620,20 @@ class SearchClient:
             
         return search
     
-    def search(self, query, start, per_page):
-        return self.client(query, start, per_page)
+    async def search(self, query, start, per_page):
+        if asyncio.iscoroutinefunction(self.client):
+            return await self.client(query, start, per_page)
+        return await asyncio.to_thread(self.client, query, start, per_page)
 
     def error_handler(self, e: Exception):
         if self.search_engine == 'google':
+            # Timeouts and dropped connections that outlasted the retries carry no response;
+            # stop the run so the session keeps this query's offset
+            if not hasattr(e, 'content'):
+                raise e
             try:
                 self.logger.debug(str(e))
-                error_content = json.loads(e.content)
+                error_content = orjson.loads(e.content)
                 if error_content['error']['status'] == 'RESOURCE_EXHAUSTED':
                     self.logger.info("Resource limit reached")
                     self.is_limit_reached = True
@@ -309,8 +642,8 @@ class SearchClient:
                     self.logger.info("No more links for current query")
                 else:
                     raise e
-            except json.JSONDecodeError:
-                self.logger.error(e.content)
+            except orjson.JSONDecodeError:
+                self.logger.error(e.content.decode(errors='replace'))
             return []
         elif self.search_engine == 'duckduckgo':
             if '202' in str(e):
@@ -324,44 +657,69 @@ class SearchClient:
             raise Exception('not implemented yet')
 
 
-def main(client: SearchClient, file_or_query: str, resume: bool, session: Session, options: Dict[str, Any]) -> None:
+async def main(client: SearchClient, file_or_query: str, resume: bool, session: Session, options: Dict[str, Any]) -> None:
     current_query = None
-    offset = None
+    offsets: Dict[str, int] = {}
+    done: Set[str] = set()
+    seen_urls: List[str] = []
     session = Session(session)
     if resume:
         data = session.load()
         file_or_query = data['file_or_query']
         options = data['options']
-        offset = data['offset']
         current_query = data['current_query']
+        offsets = data.get('offsets', {current_query: data.get('offset')})
+        done = set(data.get('done', []))
+        seen_urls = data.get('seen_urls', [])
 
     logger = Logger(options)
     client.logger = logger
     logger.info(f"Using {client.search_engine} as search engine")
-    dorker = Dorker(logger, client.search, client.error_handler)
 
     queries = load_queries(file_or_query)
     if current_query:
-        index = next((i for i, q in enumerate(queries) if q == current_query), len(queries))
-        queries = queries[index:]
-
-    signal.signal(signal.SIGINT, lambda signum, frame: handle_exit_signal(
-        session, search_client.api_key if hasattr(search_client, 'api_key') else None, 
-        search_client.cse_id if hasattr(search_client, 'cse_id') else None, 
-        file_or_query, logger, dorker))
-        
-    for i, query in enumerate(queries):
-        logger.info(f"Query: {query}")
         try:
-            dorker.query_results(query, offset)
-            session.save(file_or_query, logger, dorker)
-        except Exception as e:
-            if i:
-                logger.error(f"Error during query execution: {e}")
-            session.save(file_or_query, logger, dorker)
+            queries = queries[queries.index(current_query):]
+        except ValueError:
+            queries = []
+    queries = [q for q in queries if q not in done]
+
+    cache = None if options.get('no_cache') else SearchCache(client.cache_namespace)
+    async with Dorker(logger, client.search, client.error_handler, cache) as dorker:
+        client.http = dorker.http
+        dorker.seen_urls.update(seen_urls)
+        dorker.logged_urls.update(seen_urls)
+        signal.signal(signal.SIGINT, lambda signum, frame: handle_exit_signal(dorker))
+
+        sem = asyncio.Semaphore(options.get('jobs', dorker.max_queries))
+
+        async def bounded(query: str) -> None:
+            async with sem:
+                if dorker.is_stopped:
+                    return
+                logger.info(f"Query: {query}")
+                try:
+                    await dorker.query_results(query, offsets.get(query))
+                except Exception as e:
+                    # Other queries finish their current page so the saved offsets stay accurate
+                    if client.is_limit_reached:
+                        dorker.is_limit_reached = True
+                    else:
+                        dorker.error = dorker.error or e
+                    return
+                session.save(file_or_query, logger, dorker, queries)
+
+        await asyncio.gather(*[bounded(q) for q in queries])
+        if dorker.error:
+            logger.error(f"Error during query execution: {str(dorker.error) or type(dorker.error).__name__}")
+            session.save(file_or_query, logger, dorker, queries)
             exit(1)
+        if dorker.is_interrupted:
+            logger.info("Interrupted by user, saving session...")
+            session.save(file_or_query, logger, dorker, queries)
+            exit(0)
         if dorker.is_limit_reached:
-            session.save(file_or_query, logger, dorker)
+            session.save(file_or_query, logger, dorker, queries)
             exit(1)
     session.clean()
 
@@ -419,6 +777,11 @@ Config file is located in ~/.config/gdorker/config.json
         "-s", "--session",
         help="Resume from"
     )
+    output.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't reuse search results cached in ~/.cache/gdorker for 24h"
+    )
 
     content = parser.add_argument_group('Options that trigger additional request for each URL')
     content.add_argument(
@@ -432,12 +795,24 @@ Config file is located in ~/.config/gdorker/config.json
         help="Include first 100 chars of page body (no extra request for duckduckgo)"
     )
 
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=Dorker.max_queries,
+        help="Number of queries to run concurrently"
+    )
+
     parser.add_argument(
         "-e", "--engine",
         default="google",
         choices=["google", "duckduckgo"],
         help="Search engine to use"
     )
+    parser.add_argument(
+        "--api-client",
+        action="store_true",
+        help="Query Google through google-api-python-client instead of plain REST calls"
+    )
 
     args = parser.parse_args()
     options = {
@@ -446,7 +821,9 @@ Config file is located in ~/.config/gdorker/config.json
         'code': args.code,
         'dest': args.file,
         'debug': args.debug,
-        'engine': args.engine
+        'engine': args.engine,
+        'no_cache': args.no_cache,
+        'jobs': args.jobs
     }
 
     #if args.debug:
@@ -454,6 +831,8 @@ Config file is located in ~/.config/gdorker/config.json
 
     if not args.query and not args.session:
         raise ValueError("No query specified")
+    if args.jobs < 1:
+        raise ValueError("Number of jobs must be at least 1")
 
     session = args.session
     resume = bool(session)
@@ -465,8 +844,8 @@ Config file is located in ~/.config/gdorker/config.json
     if args.api_key and args.cx:
         config.set_api_keys(args.api_key, args.cx)
 
-    search_client = SearchClient(args.engine, config)
-    main(search_client, args.query, resume, session, options)
+    search_client = SearchClient(args.engine, config, args.api_client)
+    asyncio.run(main(search_client, args.query, resume, session, options))
 
 if __name__ == "__main__":
     entrypoint()
@@ -1,6 +1,201 @@
 import unittest
+import asyncio
+import os
+import tempfile
 from unittest.mock import patch, MagicMock
-from gdorker import main
+import orjson
+from gdorker import main, Dorker, Session, SearchClient, SearchCache, ApiError
 import json
 
-pass
+OPTIONS = {
+    'title': True,
+    'body': False,
+    'code': False,
+    'dest': None,
+    'debug': False,
+    'engine': 'google',
+    'no_cache': True,
+    'jobs': 1
+}
+
+
+def google_client(cse_id='CX'):
+    config = MagicMock()
+    config.get_google_api_keys.return_value = ('KEY', cse_id)
+    return SearchClient('google', config)
+
+
+class StubSearch:
+    def __init__(self, pages, fail=None):
+        self.pages = pages
+        self.fail = fail or {}
+        self.calls = []
+
+    async def search(self, q, start, per_page):
+        self.calls.append((q, start))
+        if (q, start) in self.fail:
+            raise self.fail[(q, start)]
+        return {'items': [{'link': link, 'title': q} for link in self.pages.get((q, start), [])]}
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.queries = os.path.join(self.tmp.name, 'dorks.txt')
+        with open(self.queries, 'w') as f:
+            f.write('q1\nq2\nq3\n')
+        self.session = os.path.join(self.tmp.name, 'session.json')
+
+    def _run(self, stub, resume=False, options=OPTIONS):
+        client = google_client()
+        client.client = stub.search
+        asyncio.run(main(client, self.queries, resume, self.session, dict(options)))
+
+    def _write_session(self, data):
+        data = {'file_or_query': self.queries, 'options': OPTIONS, **data}
+        with open(self.session, 'wb') as f:
+            f.write(orjson.dumps(data))
+
+    def test_resume_session(self):
+        self._write_session({
+            'current_query': 'q2',
+            'offsets': {'q2': 10},
+            'done': ['q3'],
+            'seen_urls': ['https://example.com/seen']
+        })
+        stub = StubSearch({('q2', 10): ['https://example.com/seen', 'https://example.com/new']})
+        self._run(stub, resume=True)
+        self.assertEqual(stub.calls, [('q2', 10), ('q2', 20)])
+        self.assertFalse(os.path.exists(self.session))
+
+    def test_resume_old_session_with_single_offset(self):
+        self._write_session({'current_query': 'q2', 'offset': 10})
+        stub = StubSearch({})
+        self._run(stub, resume=True)
+        self.assertEqual(stub.calls, [('q2', 10), ('q3', 0)])
+
+    def test_quota_stops_run_and_saves_session(self):
+        quota = ApiError(429, {}, orjson.dumps({'error': {
+            'status': 'RESOURCE_EXHAUSTED',
+            'message': "Quota exceeded for quota metric 'Queries' and limit 'Queries per day'"
+        }}))
+        stub = StubSearch({('q1', 0): ['https://example.com/a']}, fail={('q1', 10): quota})
+        with self.assertRaises(SystemExit) as exit_:
+            self._run(stub)
+        self.assertEqual(exit_.exception.code, 1)
+        self.assertEqual(stub.calls, [('q1', 0), ('q1', 10)])
+        with open(self.session, 'rb') as f:
+            saved = orjson.loads(f.read())
+        self.assertEqual(saved['current_query'], 'q1')
+        self.assertEqual(saved['offsets'], {'q1': 10})
+        self.assertEqual(saved['seen_urls'], ['https://example.com/a'])
+
+    def test_session_only_keeps_urls_of_settled_pages(self):
+        released = asyncio.Event()
+
+        async def fetch(dorker, url):
+            if url.endswith('/slow'):
+                await released.wait()
+            return (200, '')
+
+        snapshots = []
+        real_save = Session.save
+
+        def save(session, *args):
+            real_save(session, *args)
+            with open(session.file, 'rb') as f:
+                snapshots.append(orjson.loads(f.read()))
+            released.set()
+
+        stub = StubSearch({('q1', 0): ['https://example.com/fast'], ('q2', 0): ['https://example.com/slow']})
+        with patch.object(Dorker, '_fetch', fetch), patch.object(Session, 'save', save):
+            self._run(stub, options={**OPTIONS, 'code': True, 'jobs': 2})
+        # q1 finished while q2's first page was still being probed
+        self.assertEqual(snapshots[0]['offsets'], {'q2': 0})
+        self.assertEqual(snapshots[0]['seen_urls'], ['https://example.com/fast'])
+
+    def test_search_timeout_keeps_offset(self):
+        stub = StubSearch({('q1', 0): ['https://example.com/a']}, fail={('q1', 10): asyncio.TimeoutError()})
+        with patch.object(Dorker, 'max_retries', 0), self.assertRaises(SystemExit) as exit_:
+            self._run(stub)
+        self.assertEqual(exit_.exception.code, 1)
+        with open(self.session, 'rb') as f:
+            saved = orjson.loads(f.read())
+        self.assertEqual(saved['current_query'], 'q1')
+        self.assertEqual(saved['offsets'], {'q1': 10})
+        self.assertEqual(saved['done'], [])
+
+
+class FakeResponse:
+    status = 200
+    headers = {}
+
+    async def read(self):
+        return b'{"items": []}'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class TestGoogleClient(unittest.TestCase):
+    def test_start_is_one_based(self):
+        client = google_client()
+        client.http = MagicMock()
+        client.http.get.return_value = FakeResponse()
+        for offset in (0, 10):
+            asyncio.run(client.search('q', offset, 10))
+        starts = [call.kwargs['params']['start'] for call in client.http.get.call_args_list]
+        self.assertEqual(starts, [1, 11])
+
+
+class FakeDDGS:
+    searches = []
+
+    def text(self, query, max_results=None):
+        self.searches.append(query)
+        return [{'title': str(i), 'href': f'https://example.com/{i}', 'body': ''} for i in range(25)]
+
+
+class TestDuckDuckGoClient(unittest.TestCase):
+    def setUp(self):
+        FakeDDGS.searches = []
+        self.client = SearchClient('duckduckgo')
+        self.client.logger = MagicMock()
+
+    def _links(self, query, start):
+        return [item['link'] for item in self.client.client(query, start, 10)['items']]
+
+    @patch('gdorker.DDGS', FakeDDGS)
+    def test_pages_come_from_one_search(self):
+        self.assertEqual(self._links('q', 0), [f'https://example.com/{i}' for i in range(10)])
+        self.assertEqual(self._links('q', 10), [f'https://example.com/{i}' for i in range(10, 20)])
+        self.assertEqual(self._links('q', 20), [f'https://example.com/{i}' for i in range(20, 25)])
+        self.assertEqual(self._links('q', 30), [])
+        self.assertEqual(FakeDDGS.searches, ['q'])
+
+    @patch('gdorker.DDGS', FakeDDGS)
+    def test_resumed_offset_skips_ahead(self):
+        self.assertEqual(self._links('q', 20), [f'https://example.com/{i}' for i in range(20, 25)])
+        self.assertEqual(FakeDDGS.searches, ['q'])
+
+
+class TestSearchCache(unittest.TestCase):
+    def _client(self, cse_id):
+        return google_client(cse_id)
+
+    def test_cache_is_keyed_on_cse_id(self):
+        key = ('site:example.com', 0, 10)
+        results = {'items': [{'link': 'https://example.com/', 'title': 'CX1'}]}
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first = SearchCache(self._client('CX1').cache_namespace, cache_dir=cache_dir)
+            first.set(key, results)
+            other = SearchCache(self._client('CX2').cache_namespace, cache_dir=cache_dir)
+            same = SearchCache(self._client('CX1').cache_namespace, cache_dir=cache_dir)
+            self.assertIsNone(other.get(key))
+            self.assertEqual(same.get(key), results)
+
+if __name__ == '__main__':
+    unittest.main()